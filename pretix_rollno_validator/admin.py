@@ -24,7 +24,8 @@ class StudentAdmin(admin.ModelAdmin):
     
     def get_queryset(self, request):
         """Only show students for events the user has access to"""
-        qs = super().get_queryset(request)
+        # list_display shows the event, fetch it in the same query
+        qs = super().get_queryset(request).select_related('event', 'event__organizer')
         if not request.user.is_superuser:
             qs = qs.filter(event__organizer__in=request.user.teams.values_list('organizer', flat=True))
         return qs
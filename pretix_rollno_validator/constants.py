@@ -1,6 +1,17 @@
+import time
+from collections import namedtuple
+from functools import lru_cache
+
+from django.core.cache import cache
+from django.utils import translation
+from django.utils.translation import gettext_lazy as _
+
 # Cache settings
 CACHE_TIMEOUT = 3600  # 1 hour
 CACHE_KEY_PREFIX = 'pretix_rollno_validator'
+QUESTION_CHOICES_CACHE_TIMEOUT = 300  # 5 minutes, also invalidated on question changes
+DUPLICATE_CHECK_CACHE_TIMEOUT = 30  # seconds, orders are checked against the database again
+QUESTION_ACTIVE_CACHE_TIMEOUT = 300  # 5 minutes, also invalidated on question changes
 
 # Roll number validation
 MIN_ROLL_NUMBER_LENGTH = 5  # e.g., CS001
@@ -21,7 +32,7 @@ OPTIONAL_HYPHEN = r'-?'                  # Optional hyphen
 ROLL_NUMBER_PATTERN = f'^{DEPARTMENT_CODE_PATTERN}{OPTIONAL_HYPHEN}{NUMBER_PATTERN}$'
 
 # Department codes (for validation)
-VALID_DEPARTMENT_CODES = {
+VALID_DEPARTMENT_CODES = frozenset({
     'CS', 'CSE',    # Computer Science
     'EC', 'ECE',    # Electronics
     'ME', 'MECH',   # Mechanical
@@ -29,38 +40,84 @@ VALID_DEPARTMENT_CODES = {
     'CE', 'CIVIL',  # Civil
     'IT',           # Information Technology
     'BT', 'BTECH'   # Biotechnology
-}
+})
 
 # Question types that can be used for roll numbers
 VALID_QUESTION_TYPES = ['T', 'N']  # Text or Number
 
 # Order statuses to check for duplicates
+# (the values of Order.STATUS_PENDING and Order.STATUS_PAID as stored by pretix)
 DUPLICATE_CHECK_ORDER_STATUSES = [
-    'PENDING',  # Order is awaiting payment
-    'PAID',     # Order has been paid
+    'n',  # Order is awaiting payment
+    'p',  # Order has been paid
 ]
 
+# Bulk import
+BULK_IMPORT_BATCH_SIZE = 1000  # Rows per bulk_create/bulk_update statement
+PYARROW_MIN_FILE_SIZE = 1_000_000  # Bytes, larger uploads are parsed with pyarrow if installed
+PG_COPY_MIN_ROWS = 5000  # On PostgreSQL, larger imports are written with COPY instead of INSERTs
+
 # Settings keys
 SETTINGS_KEY_QUESTION_ID = 'rollno_question_id'
-SETTINGS_KEY_VALID_STUDENTS = 'valid_roll_numbers'
+SETTINGS_KEY_VALID_STUDENTS = 'valid_roll_numbers'  # Per-student metadata, only needed for messages
+SETTINGS_KEY_VALID_ROLLS = 'valid_roll_numbers_v2'  # Newline-joined roll numbers for membership tests
 SETTINGS_KEY_DEPARTMENT_CODES = 'valid_department_codes'
+SETTINGS_KEY_VERSION = 'rollno_settings_version'  # Bumped whenever valid_roll_numbers changes
 
 # Logging
 LOG_PREFIX = '[RollNoValidator]'
 LOG_FORMAT = '%(asctime)s %(levelname)s [%(name)s] %(message)s'
 
-# Error messages
-ERROR_MESSAGES = {
-    'empty': _('Roll number cannot be empty'),
-    'too_short': _('Roll number must be at least {length} characters long'),
-    'too_long': _('Roll number cannot be longer than {length} characters'),
-    'invalid_format': _('Roll number must start with a valid department code (e.g., CSE, ECE) followed by numbers'),
-    'invalid_department': _('Invalid department code. Valid codes are: {codes}'),
-    'duplicate': _('Roll number "{number}" is already in use'),
-    'not_in_list': _('Invalid roll number. Please use one of the following:\n{list}'),
-}
+# Error messages (%-style placeholders, format with msg % {...})
+MSG_EMPTY = _('Roll number cannot be empty')
+MSG_TOO_SHORT = _('Roll number must be at least %(length)d characters long')
+MSG_TOO_LONG = _('Roll number cannot be longer than %(length)d characters')
+MSG_INVALID_FORMAT = _('Roll number must start with a valid department code (e.g., CSE, ECE) followed by numbers')
+MSG_INVALID_DEPARTMENT = _('Invalid department code. Valid codes are: %(codes)s')
+MSG_DUPLICATE = _('Roll number "%(number)s" is already in use')
+MSG_NOT_IN_LIST = _('Invalid roll number. Please use one of the following:\n%(list)s')
+
+ErrorMessages = namedtuple('ErrorMessages', [
+    'empty', 'too_short', 'too_long', 'invalid_format', 'invalid_department', 'duplicate', 'not_in_list'
+])
+
+
+@lru_cache(maxsize=16)
+def get_error_messages(language):
+    """Translate all error messages once per language instead of on every use"""
+    with translation.override(language):
+        return ErrorMessages(*(str(message) for message in (
+            MSG_EMPTY, MSG_TOO_SHORT, MSG_TOO_LONG, MSG_INVALID_FORMAT,
+            MSG_INVALID_DEPARTMENT, MSG_DUPLICATE, MSG_NOT_IN_LIST
+        )))
 
 # Cache keys
 def get_cache_key(event_id, key_type):
     """Generate cache key for different types of data"""
-    return f"{CACHE_KEY_PREFIX}:{event_id}:{key_type}" 
\ No newline at end of file
+    return f"{CACHE_KEY_PREFIX}:{event_id}:{key_type}"
+
+
+def get_revision_key(event_id):
+    """Cache key of the event's cache revision, stored inside revisioned cache values"""
+    return get_cache_key(event_id, 'revision')
+
+
+def bump_revision(event_id):
+    """Invalidate all revisioned cache values of the event with one INCR"""
+    key = get_revision_key(event_id)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Missing or evicted, start from the clock so an old revision is never reused
+        revision = int(time.time() * 1000)
+        cache.set(key, revision, timeout=None)
+        return revision
+
+
+# Attribute of the Event instance holding the snapshot built by signals.get_snapshot
+SNAPSHOT_ATTR = '_rollno_snapshot'
+
+
+def clear_snapshot(event):
+    """Drop the roll number snapshot of the instance after changing the settings it is built from"""
+    event.__dict__.pop(SNAPSHOT_ATTR, None)
@@ -1,8 +1,25 @@
 import csv
 import io
+from itertools import repeat
 from django import forms
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
-from .models import Student
+from .constants import BULK_IMPORT_BATCH_SIZE, PG_COPY_MIN_ROWS, PYARROW_MIN_FILE_SIZE
+from .models import Event, Student
+
+try:
+    import pyarrow
+    import pyarrow.compute as pyarrow_compute
+    import pyarrow.csv as pyarrow_csv
+except ImportError:  # Optional, install with the 'fast' extra
+    pyarrow = None
+
+# Student fields that can be set from an imported CSV row
+STUDENT_IMPORT_FIELDS = ['name', 'department', 'email', 'batch', 'is_active']
+IMPORT_COLUMNS = ['roll_number', *STUDENT_IMPORT_FIELDS]
+# First letters of is_active values that count as true (true/yes/1), a blank cell means active
+TRUTHY_PREFIXES = frozenset({'t', 'y', '1'})
 
 
 class StudentBulkImportForm(forms.Form):
@@ -41,74 +58,215 @@ class StudentBulkImportForm(forms.Form):
         required_fields = {'roll_number', 'name', 'department'}
         
         try:
-            # Read CSV file
-            decoded_file = csv_file.read().decode('utf-8')
-            io_string = io.StringIO(decoded_file)
-            reader = csv.DictReader(io_string)
+            # Stream the upload instead of decoding it into memory at once
+            csv_file.seek(0)
+            text = io.TextIOWrapper(csv_file.file, encoding='utf-8-sig', newline='')
+            reader = csv.reader(text)
             
             # Validate headers
-            headers = set(reader.fieldnames)
-            missing_fields = required_fields - headers
+            headers = next(reader, [])
+            columns = {name.strip(): index for index, name in enumerate(headers)}
+            missing_fields = required_fields - columns.keys()
             if missing_fields:
                 raise forms.ValidationError(
                     _('Missing required columns: {fields}').format(
-                        fields=', '.join(missing_fields)
+                        fields=', '.join(sorted(missing_fields))
                     )
                 )
             
-            # Store rows for later processing
-            self.cleaned_data['rows'] = list(reader)
+            # Rows are normalized (roll_number, *STUDENT_IMPORT_FIELDS) tuples for save()
+            if pyarrow is not None and csv_file.size > PYARROW_MIN_FILE_SIZE:
+                # Hand the file back without closing it and parse it in C
+                text.detach()
+                self._rows = self._read_with_pyarrow(csv_file, headers)
+            else:
+                # Streamed lazily while save() iterates
+                self._rows = self._normalize_rows(reader, columns)
             
             return csv_file
             
+        except forms.ValidationError:
+            raise
         except UnicodeDecodeError:
             raise forms.ValidationError(_('Please upload a valid UTF-8 encoded CSV file'))
         except Exception as e:
             raise forms.ValidationError(_('Error reading CSV file: {error}').format(error=str(e)))
 
+    def _read_with_pyarrow(self, csv_file, headers):
+        """Parse a large upload with pyarrow and normalize it column by column"""
+        raw_names = {name.strip(): name for name in headers}
+        names = [name for name in IMPORT_COLUMNS if name in raw_names]
+        
+        csv_file.seek(0)
+        table = pyarrow_csv.read_csv(
+            csv_file.file,
+            read_options=pyarrow_csv.ReadOptions(block_size=1 << 20),
+            convert_options=pyarrow_csv.ConvertOptions(
+                include_columns=[raw_names[name] for name in names],
+                # Keep every value a string, no type inference for batch/is_active
+                column_types={raw_names[name]: pyarrow.string() for name in names},
+            )
+        )
+        
+        def column(name, default=''):
+            if name not in raw_names:
+                return repeat(default)
+            values = table.column(raw_names[name])
+            values = pyarrow_compute.utf8_trim_whitespace(values)
+            if name == 'is_active':
+                first = pyarrow_compute.utf8_lower(pyarrow_compute.utf8_slice_codeunits(values, 0, 1))
+                values = pyarrow_compute.is_in(first, value_set=pyarrow.array([*TRUTHY_PREFIXES, '']))
+            elif name == 'roll_number':
+                values = pyarrow_compute.utf8_upper(values)
+            return values.to_pylist()
+        
+        return zip(
+            column('roll_number'),
+            *(column(name, True if name == 'is_active' else '') for name in STUDENT_IMPORT_FIELDS)
+        )
+
+    @staticmethod
+    def _normalize_rows(reader, columns):
+        """Yield normalized tuples from positional CSV rows"""
+        def field(row, name, default=''):
+            index = columns.get(name)
+            if index is None or index >= len(row):
+                return default
+            return row[index]
+        
+        for row in reader:
+            yield (
+                field(row, 'roll_number').strip().upper(),
+                field(row, 'name').strip(),
+                field(row, 'department').strip(),
+                field(row, 'email').strip(),
+                field(row, 'batch').strip(),
+                (field(row, 'is_active').strip() or 't')[:1].lower() in TRUTHY_PREFIXES,
+            )
+
     def save(self):
         event = self.cleaned_data['event']
-        rows = self.cleaned_data['rows']
         update_existing = self.cleaned_data['update_existing']
         
-        created = []
-        updated = []
+        # Load all students of the event once instead of querying per row.
+        # Keyed upper-case like the imported rows, older rows may be stored in lower case.
+        existing = {
+            s.roll_number.upper(): s
+            for s in Student.objects.filter(event=event).only('id', 'roll_number', *STUDENT_IMPORT_FIELDS)
+        }
+        to_create = {}
+        to_update = {}
         errors = []
+        now = timezone.now()
         
-        for row in rows:
-            try:
-                # Clean and normalize data
-                student_data = {
-                    'event': event,
-                    'roll_number': row['roll_number'].strip().upper(),
-                    'name': row['name'].strip(),
-                    'department': row['department'].strip(),
-                    'email': row.get('email', '').strip(),
-                    'batch': row.get('batch', '').strip(),
-                    'is_active': row.get('is_active', 'true').lower() == 'true'
-                }
-                
-                # Try to get existing student
-                student, created_new = Student.objects.get_or_create(
-                    event=event,
-                    roll_number=student_data['roll_number'],
-                    defaults=student_data
-                )
-                
-                if not created_new and update_existing:
-                    # Update existing student
-                    for key, value in student_data.items():
-                        setattr(student, key, value)
-                    student.save()
-                    updated.append(student)
-                elif created_new:
-                    created.append(student)
+        try:
+            for row_number, (roll_number, *values) in enumerate(self._rows, start=2):
+                try:
+                    # Rows arrive already normalized from clean_csv_file
+                    student_data = dict(zip(STUDENT_IMPORT_FIELDS, values))
                     
-            except Exception as e:
-                errors.append(f"Row {row}: {str(e)}")
+                    student = existing.get(roll_number)
+                    if student is None:
+                        student = Student(event=event, roll_number=roll_number, **student_data)
+                    elif update_existing:
+                        # Also stores older lower-case roll numbers in the normalized form
+                        student.roll_number = roll_number
+                        for key, value in student_data.items():
+                            setattr(student, key, value)
+                        student.updated_at = now
+                    else:
+                        continue
+                    
+                    # Field-level validation of the imported fields only, uniqueness is resolved
+                    # above. Reading a field deferred by only() would cost a query per row.
+                    student.clean_fields(exclude=['event', 'created_at', 'updated_at'])
+                    
+                    if student.pk is None:
+                        to_create[roll_number] = student
+                        existing[roll_number] = student
+                    else:
+                        to_update[roll_number] = student
+                        
+                except Exception as e:
+                    errors.append(f"Row {row_number}: {str(e)}")
+        except (UnicodeDecodeError, csv.Error) as e:
+            # Decoding and parsing happen while streaming, so a broken file aborts the whole import
+            if isinstance(e, UnicodeDecodeError):
+                errors.append(str(_('Please upload a valid UTF-8 encoded CSV file')))
+            else:
+                errors.append(str(_('Error reading CSV file: {error}').format(error=str(e))))
+            return {
+                'created': [],
+                'updated': [],
+                'errors': errors
+            }
+        
+        created = list(to_create.values())
+        updated = list(to_update.values())
+        
+        try:
+            with transaction.atomic():
+                if connection.vendor == 'postgresql' and len(created) + len(updated) >= PG_COPY_MIN_ROWS:
+                    self._copy_students(event, created + updated, now)
+                else:
+                    Student.objects.bulk_create(created, batch_size=BULK_IMPORT_BATCH_SIZE)
+                    Student.objects.bulk_update(
+                        updated, ['roll_number', *STUDENT_IMPORT_FIELDS, 'updated_at'], batch_size=BULK_IMPORT_BATCH_SIZE
+                    )
+        except IntegrityError:
+            # A student was added concurrently, e.g. by another import; nothing was saved
+            errors.append(str(_('Some roll numbers were added while importing, please upload the file again')))
+            return {
+                'created': [],
+                'updated': [],
+                'errors': errors
+            }
+        
+        # bulk_create/bulk_update bypass Student.save, so refresh the settings once
+        if created or updated:
+            Student._rebuild_settings(event)
         
         return {
             'created': created,
             'updated': updated,
             'errors': errors
-        } 
\ No newline at end of file
+        }
+
+    @staticmethod
+    def _copy_students(event, students, now):
+        """Upsert students on PostgreSQL by COPYing them into a temporary table"""
+        table = connection.ops.quote_name(Student._meta.db_table)
+        columns = ', '.join(['event_id', 'roll_number', *STUDENT_IMPORT_FIELDS, 'created_at', 'updated_at'])
+        updates = ', '.join(
+            f'{name} = EXCLUDED.{name}' for name in ['roll_number', *STUDENT_IMPORT_FIELDS, 'updated_at']
+        )
+        
+        # Quote everything so empty strings are not read back as NULL
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, quoting=csv.QUOTE_ALL)
+        # event.pk, not s.event_id: that field is deferred on the loaded students
+        for s in students:
+            writer.writerow([
+                event.pk, s.roll_number, s.name, s.department, s.email, s.batch,
+                't' if s.is_active else 'f', now.isoformat(), now.isoformat()
+            ])
+        buffer.seek(0)
+        
+        copy_sql = f'COPY rollno_student_import ({columns}) FROM STDIN WITH (FORMAT csv)'
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE TEMP TABLE rollno_student_import ON COMMIT DROP AS '
+                f'SELECT {columns} FROM {table} WITH NO DATA'
+            )
+            if hasattr(cursor, 'copy_expert'):  # psycopg2
+                cursor.copy_expert(copy_sql, buffer)
+            else:  # psycopg 3
+                with cursor.copy(copy_sql) as copy:
+                    copy.write(buffer.getvalue())
+            # created_at is only set for new rows, existing ones keep theirs. The conflict
+            # target is the expression of the unique index from migration 0003, so rows that
+            # differ only in case are updated too (an exact match also conflicts there)
+            cursor.execute(
+                f'INSERT INTO {table} ({columns}) SELECT {columns} FROM rollno_student_import '
+                f'ON CONFLICT (event_id, UPPER(roll_number)) DO UPDATE SET {updates}'
+            )
@@ -0,0 +1,35 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('pretixbase', '__first__'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Student',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('roll_number', models.CharField(help_text='Student roll number (e.g., CSE001)', max_length=20, verbose_name='Roll Number')),
+                ('name', models.CharField(help_text='Full name of the student', max_length=100, verbose_name='Student Name')),
+                ('department', models.CharField(help_text='Department or branch of the student', max_length=50, verbose_name='Department')),
+                ('email', models.EmailField(blank=True, help_text='Student email address', max_length=254, verbose_name='Email')),
+                ('batch', models.CharField(blank=True, help_text='Student batch/year', max_length=10, verbose_name='Batch')),
+                ('is_active', models.BooleanField(default=True, help_text='Whether this student is active and allowed to purchase tickets', verbose_name='Active')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='valid_students', to='pretixbase.event')),
+            ],
+            options={
+                'verbose_name': 'Student',
+                'verbose_name_plural': 'Students',
+                'ordering': ['roll_number'],
+                'unique_together': {('event', 'roll_number')},
+            },
+        ),
+    ]
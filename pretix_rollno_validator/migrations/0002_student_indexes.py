@@ -0,0 +1,48 @@
+from django.db import migrations, models
+
+# (event, roll_number) lookups already use the unique index of unique_together
+INDEXES = [
+    models.Index(fields=['event', 'is_active'], name='rn_event_active_idx'),
+]
+
+
+def add_indexes(apps, schema_editor):
+    """Build the indexes without locking writes on PostgreSQL"""
+    model = apps.get_model('pretix_rollno_validator', 'Student')
+    concurrently = schema_editor.connection.vendor == 'postgresql'
+    for index in INDEXES:
+        if concurrently:
+            schema_editor.add_index(model, index, concurrently=True)
+        else:
+            schema_editor.add_index(model, index)
+
+
+def remove_indexes(apps, schema_editor):
+    model = apps.get_model('pretix_rollno_validator', 'Student')
+    concurrently = schema_editor.connection.vendor == 'postgresql'
+    for index in INDEXES:
+        if concurrently:
+            schema_editor.remove_index(model, index, concurrently=True)
+        else:
+            schema_editor.remove_index(model, index)
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('pretix_rollno_validator', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddIndex(model_name='student', index=index)
+                for index in INDEXES
+            ],
+            database_operations=[
+                migrations.RunPython(add_indexes, remove_indexes),
+            ],
+        ),
+    ]
@@ -0,0 +1,92 @@
+from django.db import migrations
+from django.db.models import Count
+from django.db.models.functions import Upper
+
+INDEX_NAME = 'rn_event_upper_roll_uniq'
+
+
+def check_case_duplicates(apps, schema_editor):
+    """
+    Roll numbers differing only in case were allowed before and would make the unique
+    index fail. Stop with a list of them so operators decide which students to keep.
+    """
+    model = apps.get_model('pretix_rollno_validator', 'Student')
+    students = model.objects.using(schema_editor.connection.alias).annotate(
+        upper_roll=Upper('roll_number')
+    )
+    groups = students.values('event_id', 'upper_roll').annotate(
+        count=Count('id')
+    ).filter(count__gt=1).order_by('event_id', 'upper_roll')
+    
+    conflicts = [
+        'event {event_id}: {rolls}'.format(
+            event_id=group['event_id'],
+            rolls=', '.join(sorted(students.filter(
+                event_id=group['event_id'], upper_roll=group['upper_roll']
+            ).values_list('roll_number', flat=True)))
+        )
+        for group in groups
+    ]
+    if conflicts:
+        raise RuntimeError(
+            'Students with roll numbers that differ only in case must be merged or removed '
+            'before roll numbers can be made unique regardless of case:\n' + '\n'.join(conflicts)
+        )
+
+
+def drop_invalid_index(schema_editor):
+    """
+    A failed CREATE INDEX CONCURRENTLY leaves an INVALID index behind, which
+    IF NOT EXISTS would accept on the next migrate. Drop it so the build is retried.
+    """
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid '
+            'WHERE c.relname = %s AND pg_table_is_visible(c.oid) AND NOT i.indisvalid',
+            [INDEX_NAME]
+        )
+        invalid = cursor.fetchone() is not None
+    if invalid:
+        schema_editor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {INDEX_NAME}')
+
+
+def add_index(apps, schema_editor):
+    """Enforce case-insensitive uniqueness of roll numbers per event"""
+    model = apps.get_model('pretix_rollno_validator', 'Student')
+    table = schema_editor.quote_name(model._meta.db_table)
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        drop_invalid_index(schema_editor)
+        sql = f'CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS {INDEX_NAME} ON {table} (event_id, UPPER(roll_number))'
+    elif vendor == 'mysql':
+        sql = f'CREATE UNIQUE INDEX {INDEX_NAME} ON {table} (event_id, (UPPER(roll_number)))'
+    else:
+        sql = f'CREATE UNIQUE INDEX IF NOT EXISTS {INDEX_NAME} ON {table} (event_id, UPPER(roll_number))'
+    schema_editor.execute(sql)
+
+
+def remove_index(apps, schema_editor):
+    model = apps.get_model('pretix_rollno_validator', 'Student')
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        sql = f'DROP INDEX CONCURRENTLY IF EXISTS {INDEX_NAME}'
+    elif vendor == 'mysql':
+        sql = f'DROP INDEX {INDEX_NAME} ON {schema_editor.quote_name(model._meta.db_table)}'
+    else:
+        sql = f'DROP INDEX IF EXISTS {INDEX_NAME}'
+    schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+    # Functional unique constraints need Django 4.0, so the index is created in SQL.
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction.
+    atomic = False
+
+    dependencies = [
+        ('pretix_rollno_validator', '0002_student_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_case_duplicates, migrations.RunPython.noop),
+        migrations.RunPython(add_index, remove_index),
+    ]
@@ -0,0 +1,62 @@
+from django.db import migrations
+
+INDEX_NAME = 'rn_qa_upper_answer_idx'
+
+
+def drop_invalid_index(schema_editor):
+    """
+    A failed CREATE INDEX CONCURRENTLY leaves an INVALID index behind, which
+    IF NOT EXISTS would accept on the next migrate. Drop it so the build is retried.
+    """
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid '
+            'WHERE c.relname = %s AND pg_table_is_visible(c.oid) AND NOT i.indisvalid',
+            [INDEX_NAME]
+        )
+        invalid = cursor.fetchone() is not None
+    if invalid:
+        schema_editor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {INDEX_NAME}')
+
+
+def add_index(apps, schema_editor):
+    """Index the upper-cased answers used by the duplicate roll number check"""
+    model = apps.get_model('pretixbase', 'QuestionAnswer')
+    table = schema_editor.quote_name(model._meta.db_table)
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        drop_invalid_index(schema_editor)
+        # Hash, as free text answers of other questions can exceed the B-tree row size limit
+        sql = f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {INDEX_NAME} ON {table} USING hash (UPPER(answer))'
+    elif vendor == 'mysql':
+        # Functional indexes on LONGTEXT columns are not supported
+        return
+    else:
+        sql = f'CREATE INDEX IF NOT EXISTS {INDEX_NAME} ON {table} (UPPER(answer))'
+    schema_editor.execute(sql)
+
+
+def remove_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        sql = f'DROP INDEX CONCURRENTLY IF EXISTS {INDEX_NAME}'
+    elif vendor == 'mysql':
+        return
+    else:
+        sql = f'DROP INDEX IF EXISTS {INDEX_NAME}'
+    schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+    # The table belongs to pretix, so the index is created in SQL and kept out of the model state.
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction.
+    atomic = False
+
+    dependencies = [
+        ('pretix_rollno_validator', '0003_student_upper_roll_unique'),
+        ('pretixbase', '__first__'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_index, remove_index),
+    ]
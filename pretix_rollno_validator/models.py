@@ -1,7 +1,16 @@
+import time
+
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 from pretix.base.models import Event
 
+from .constants import SETTINGS_KEY_VALID_ROLLS, SETTINGS_KEY_VALID_STUDENTS, SETTINGS_KEY_VERSION, clear_snapshot
+
+try:
+    import orjson
+except ImportError:  # Optional, install with the 'fast' extra
+    orjson = None
+
 
 class Student(models.Model):
     """Model to store student information"""
@@ -42,6 +51,9 @@ class Student(models.Model):
 
     class Meta:
         unique_together = ('event', 'roll_number')
+        indexes = [
+            models.Index(fields=['event', 'is_active'], name='rn_event_active_idx'),
+        ]
         ordering = ['roll_number']
         verbose_name = _('Student')
         verbose_name_plural = _('Students')
@@ -49,26 +61,40 @@ class Student(models.Model):
     def __str__(self):
         return f"{self.roll_number} - {self.name}"
 
-    def save(self, *args, **kwargs):
-        # Update the event settings when student data changes
-        super().save(*args, **kwargs)
-        self._update_event_settings()
+    def clean(self):
+        # Stored upper-case like bulk import does, backed by the
+        # (event, UPPER(roll_number)) unique index from migration 0003
+        self.roll_number = self.roll_number.strip().upper()
 
-    def delete(self, *args, **kwargs):
-        # Update the event settings when student is deleted
-        super().delete(*args, **kwargs)
-        self._update_event_settings()
-
-    def _update_event_settings(self):
-        """Update the event settings with current student data"""
-        # Get all active students for this event
-        students = Student.objects.filter(
-            event=self.event,
+    @classmethod
+    def _rebuild_settings(cls, event):
+        """
+        Rewrite the event settings from all active students of the event.
+        Called once per transaction by the post_save/post_delete receivers in signals.py
+        and directly after bulk operations, which send no model signals.
+        """
+        students = cls.objects.filter(
+            event=event,
             is_active=True
         ).values('roll_number', 'name', 'department', 'batch')
-        
-        # Convert to list of dictionaries
-        valid_students = list(students)
-        
-        # Update event settings
-        self.event.settings.set('valid_roll_numbers', valid_students) 
\ No newline at end of file
+
+        cls._store_settings(event, list(students))
+
+    @staticmethod
+    def _store_settings(event, valid_students):
+        """Write the student list and bump its version so cached copies are dropped"""
+        if orjson is not None:
+            # Strings are stored as they are and read back with json.loads by as_type=list
+            event.settings.set(SETTINGS_KEY_VALID_STUDENTS, orjson.dumps(valid_students).decode())
+        else:
+            event.settings.set(SETTINGS_KEY_VALID_STUDENTS, valid_students)
+        # The validator only needs the roll numbers, keep them in a compact string
+        event.settings.set(
+            SETTINGS_KEY_VALID_ROLLS,
+            '\n'.join(s['roll_number'] for s in valid_students)
+        )
+        # Time-based so a recycled event id never meets a cached version
+        previous = event.settings.get(SETTINGS_KEY_VERSION, 0, as_type=int)
+        event.settings.set(SETTINGS_KEY_VERSION, max(previous + 1, int(time.time() * 1000)))
+        # Built once per Event instance, so it has to go with the settings it was built from
+        clear_snapshot(event)
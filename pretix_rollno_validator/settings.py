@@ -1,11 +1,17 @@
 import logging
+from django.conf import settings as django_settings
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
+from django.utils import translation
 from django.utils.translation import gettext_lazy as _
+from pretix.base.models import Question
 from pretix.base.settings import SettingsSandbox
 from pretix.base.signals import event_copy_data, event_settings_panel
 from django.core.cache import cache
 from django import forms
 
+from .constants import QUESTION_CHOICES_CACHE_TIMEOUT, clear_snapshot, get_cache_key
+
 logger = logging.getLogger(__name__)
 
 CACHE_TIMEOUT = 3600  # 1 hour
@@ -28,11 +34,49 @@ class RollNumberSettingsHolder(SettingsSandbox):
         cache_key = f'rollno_question_{self.event.pk}'
         self.settings.set('rollno_question_id', value)
         cache.set(cache_key, value, CACHE_TIMEOUT)
+        # The validator's snapshot of this instance still holds the old question
+        clear_snapshot(self.event)
+
+
+def _question_choices_cache_key(event_id, language):
+    return get_cache_key(event_id, f'question_choices:{language}')
+
+
+def get_question_choices(event):
+    """Get (pk, label) choices of the questions usable for roll numbers, cached per language"""
+    def load():
+        # Only text or number questions that are required and active
+        return [
+            (q.pk, str(q.question))
+            for q in event.questions.filter(
+                type__in=['T', 'N'],  # Text or Number type questions
+                required=True,
+                active=True
+            )
+        ]
+    
+    return cache.get_or_set(
+        _question_choices_cache_key(event.pk, translation.get_language()),
+        load,
+        QUESTION_CHOICES_CACHE_TIMEOUT
+    )
+
+
+@receiver(post_save, sender=Question, dispatch_uid='rollno_question_saved')
+@receiver(post_delete, sender=Question, dispatch_uid='rollno_question_deleted')
+def invalidate_question_choices(sender, instance, **kwargs):
+    """Drop the cached question choices of the question's event"""
+    cache.delete_many([
+        _question_choices_cache_key(instance.event_id, language)
+        for language, name in django_settings.LANGUAGES
+    ])
 
 
 class RollNumberSettingsForm(forms.Form):
-    rollno_question_id = forms.ModelChoiceField(
-        queryset=None,  # Set in __init__
+    rollno_question_id = forms.TypedChoiceField(
+        choices=(),  # Set in __init__
+        coerce=int,
+        empty_value=None,
         required=False,
         label=_('Roll Number Question'),
         help_text=_('Select which question should be validated for uniqueness. '
@@ -44,19 +88,25 @@ class RollNumberSettingsForm(forms.Form):
         super().__init__(*args, **kwargs)
         
         try:
-            # Only show text questions that are required and active
-            self.fields['rollno_question_id'].queryset = self.event.questions.filter(
-                type__in=['T', 'N'],  # Text or Number type questions
-                required=True,
-                active=True
-            ).select_related('event')  # Optimize query
+            # Rendering the panel needs no query while the choices are cached
+            self.fields['rollno_question_id'].choices = [('', '---------')] + get_question_choices(self.event)
             
             # Set initial value
             self.fields['rollno_question_id'].initial = self.event.settings.get('rollno_question_id')
             
         except Exception as e:
             logger.error(f"Error initializing RollNumberSettingsForm for event {self.event.pk}: {str(e)}")
-            self.fields['rollno_question_id'].queryset = self.event.questions.none()
+            self.fields['rollno_question_id'].choices = [('', '---------')]
+
+    def clean_rollno_question_id(self):
+        question_id = self.cleaned_data.get('rollno_question_id')
+        if question_id is None:
+            return None
+        # Load the selected question only on submit
+        question = self.event.questions.filter(pk=question_id).first()
+        if question is None:
+            raise forms.ValidationError(_('The selected question does not exist'))
+        return question
 
     def clean(self):
         cleaned_data = super().clean()
@@ -104,17 +154,26 @@ def register_settings_panel(sender, request, **kwargs):
 
 
 @receiver(event_copy_data, dispatch_uid='rollno_copy_data')
-def copy_settings(sender, other, **kwargs):
+def copy_settings(sender, other, question_map=None, **kwargs):
     """Copy roll number settings when duplicating an event"""
     try:
-        question_id = other.settings.get('rollno_question_id')
-        if question_id:
-            # Check if the question was also copied
-            if sender.questions.filter(pk=question_id).exists():
-                sender.settings.set('rollno_question_id', question_id)
-                logger.info(f"Roll number settings copied from event {other.pk} to {sender.pk}")
-            else:
-                logger.warning(f"Question {question_id} not found in target event {sender.pk}")
+        question_id = other.settings.get('rollno_question_id', as_type=int)
+        if not question_id:
+            return
+        
+        # pretix passes the copied questions keyed by their original pk
+        new_question = (question_map or {}).get(question_id)
+        if new_question is not None:
+            new_question_id = new_question.pk
+        elif sender.questions.filter(pk=question_id).exists():
+            new_question_id = question_id
+        else:
+            logger.warning(f"Question {question_id} not found in target event {sender.pk}")
+            return
+        
+        sender.settings.set('rollno_question_id', new_question_id)
+        clear_snapshot(sender)
+        logger.info(f"Roll number settings copied from event {other.pk} to {sender.pk}")
                 
     except Exception as e:
-        logger.error(f"Error copying roll number settings from event {other.pk} to {sender.pk}: {str(e)}") 
\ No newline at end of file
+        logger.error(f"Error copying roll number settings from event {other.pk} to {sender.pk}: {str(e)}")
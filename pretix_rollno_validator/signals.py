@@ -1,14 +1,20 @@
-import re
 import logging
+import string
+import sys
+import threading
+from collections import namedtuple
 from functools import lru_cache
-from typing import Tuple, Optional, Dict, Any
+from typing import Tuple, Optional, Dict, Any, FrozenSet, Set
 
 from django.dispatch import receiver
+from django.utils import translation
 from django.utils.translation import gettext_lazy as _
 from django.core.exceptions import ValidationError
 from django.core.cache import cache
-from django.db import transaction
+from django.db import connection, transaction
+from django.db.models.signals import post_delete, post_save
 from django.db.models import Q
+from django.db.models.functions import Upper
 
 from pretix.base.signals import order_placed, validate_cart_addons
 from pretix.base.models import QuestionAnswer, Order, OrderPosition, Question, Event
@@ -17,173 +23,349 @@ from pretix.base.services.orders import OrderError
 from .constants import (
     MIN_ROLL_NUMBER_LENGTH,
     MAX_ROLL_NUMBER_LENGTH,
-    ROLL_NUMBER_PATTERN,
-    DEPARTMENT_CODE_PATTERN,
     VALID_DEPARTMENT_CODES,
     DUPLICATE_CHECK_ORDER_STATUSES,
-    VALID_CHARS_PATTERN,
-    ERROR_MESSAGES,
-    get_cache_key
+    get_error_messages,
+    CACHE_TIMEOUT,
+    DUPLICATE_CHECK_CACHE_TIMEOUT,
+    QUESTION_ACTIVE_CACHE_TIMEOUT,
+    SETTINGS_KEY_QUESTION_ID,
+    SETTINGS_KEY_VALID_ROLLS,
+    SETTINGS_KEY_VALID_STUDENTS,
+    SETTINGS_KEY_VERSION,
+    SNAPSHOT_ATTR,
+    get_cache_key,
+    get_revision_key,
+    bump_revision
 )
 from .exceptions import DuplicateRollNumberError, InvalidRollNumberError
+from .models import Student
 
 logger = logging.getLogger(__name__)
 
-@lru_cache(maxsize=128)
-def get_department_code(roll_number: str) -> Optional[str]:
-    """Extract department code from roll number"""
-    match = re.match(DEPARTMENT_CODE_PATTERN, roll_number)
-    return match.group(0) if match else None
+def error_messages():
+    """Error messages translated for the active language"""
+    return get_error_messages(translation.get_language())
 
-def get_valid_department_codes(event: Event) -> set:
-    """Get valid department codes for the event"""
-    cache_key = get_cache_key(event.id, 'department_codes')
-    codes = cache.get(cache_key)
+def _get_revisioned(event_id: int, key_type: str) -> Tuple[int, Any]:
+    """
+    Get a cached value together with the event's cache revision in one round trip.
+    Values stored under an older revision are treated as missing.
+    Returns:
+        (int, Any): (revision, value or None)
+    """
+    revision_key = get_revision_key(event_id)
+    cache_key = get_cache_key(event_id, key_type)
+    values = cache.get_many([revision_key, cache_key])
+    revision = values.get(revision_key)
+    if revision is None:
+        # Never assume a revision: after an eviction, 0 could match values cached before
+        # the last bump. A fresh one matches nothing, whatever is cached gets rebuilt.
+        return bump_revision(event_id), None
+    hit = values.get(cache_key)
+    # Entries cached before revisions were introduced are not tuples
+    if not isinstance(hit, tuple) or hit[0] != revision:
+        return revision, None
+    return revision, hit[1]
+
+def _set_revisioned(event_id: int, key_type: str, revision: int, value: Any) -> None:
+    cache.set(get_cache_key(event_id, key_type), (revision, value), timeout=CACHE_TIMEOUT)
+
+def _get_department_codes_entry(event: Event) -> Dict[str, Any]:
+    """Get valid department codes and their sorted listing for error messages"""
+    revision, entry = _get_revisioned(event.id, 'department_code_entry')
     
-    if codes is None:
+    if entry is None:
         # Try to get from event settings
-        codes = set(event.settings.get('valid_department_codes', []))
+        codes = frozenset(event.settings.get('valid_department_codes', [], as_type=list))
         if not codes:
             # Fall back to default codes
             codes = VALID_DEPARTMENT_CODES
-        cache.set(cache_key, codes, timeout=3600)
+        entry = {'codes': codes, 'sorted_str': ', '.join(sorted(codes))}
+        _set_revisioned(event.id, 'department_code_entry', revision, entry)
     
-    return codes
+    return entry
+
+class _DeleteInvalidChars(dict):
+    """str.translate table keeping only ASCII letters, digits and hyphens"""
+    def __missing__(self, codepoint):
+        # Anything outside ASCII is deleted, not memoised to keep the table small
+        return None
+
+_CLEAN_TABLE = _DeleteInvalidChars(
+    (c, c if chr(c) in string.ascii_letters + string.digits + '-' else None)
+    for c in range(128)
+)
 
 def clean_roll_number(roll_number: str) -> str:
     """Remove invalid characters from roll number"""
     if not isinstance(roll_number, str):
         roll_number = str(roll_number)
-    # Only keep alphanumeric and hyphen characters
-    return re.sub(VALID_CHARS_PATTERN, '', roll_number)
+    # Only keep alphanumeric and hyphen characters (same set as VALID_CHARS_PATTERN)
+    return roll_number.translate(_CLEAN_TABLE)
 
 def normalize_roll_number(roll_number: str) -> str:
     """Normalize roll number by removing invalid chars and converting to uppercase"""
     if not roll_number:
         return ''
-    # Clean and normalize
-    roll_number = clean_roll_number(roll_number)
-    return roll_number.strip().upper()
-
-def validate_department_code(roll_number: str, event: Event) -> None:
-    """Validate that the department code is valid"""
-    dept_code = get_department_code(roll_number)
-    if not dept_code:
-        raise InvalidRollNumberError(ERROR_MESSAGES['invalid_format'])
-        
-    valid_codes = get_valid_department_codes(event)
-    if dept_code not in valid_codes:
+    if not isinstance(roll_number, str):
+        roll_number = str(roll_number)
+    return _normalize_roll_number(roll_number)
+
+@lru_cache(maxsize=4096)
+def _normalize_roll_number(roll_number: str) -> str:
+    # clean_roll_number inlined, this runs for every answer and predefined roll number.
+    # Interned so spellings of the same roll number share one string object.
+    return sys.intern(roll_number.translate(_CLEAN_TABLE).strip().upper())
+
+def scan_roll_number(roll_number: str) -> Optional[str]:
+    """
+    Match a normalized roll number against ROLL_NUMBER_PATTERN without the regex engine:
+    2-4 letters, an optional hyphen, then 3-6 digits.
+    Returns:
+        str: The department code if the format is valid, otherwise None
+    """
+    n = len(roll_number)
+    i = 0
+    while i < n and roll_number[i].isalpha():
+        i += 1
+    if not 2 <= i <= 4:
+        return None
+    
+    j = i + 1 if i < n and roll_number[i] == '-' else i
+    if not 3 <= n - j <= 6 or not roll_number[j:].isdigit():
+        return None
+    
+    return roll_number[:i]
+
+def _check_department_code(dept_code: str, department_codes: Dict[str, Any]) -> None:
+    if dept_code not in department_codes['codes']:
         raise InvalidRollNumberError(
-            ERROR_MESSAGES['invalid_department'].format(
-                codes=', '.join(sorted(valid_codes))
-            )
+            error_messages().invalid_department % {'codes': department_codes['sorted_str']}
         )
 
-def validate_roll_number_format(roll_number: str, event: Event, raise_exception: bool = True) -> Tuple[bool, str]:
+def _parse_roll_number(roll_number: str, department_codes: Dict[str, Any]) -> str:
+    """
+    Normalize a roll number and check length, format and department code in one pass
+    Returns:
+        str: The normalized roll number
+    Raises:
+        InvalidRollNumberError: At the first check that fails
+    """
+    if not roll_number:
+        raise InvalidRollNumberError(error_messages().empty)
+    
+    roll_number = normalize_roll_number(roll_number)
+    
+    n = len(roll_number)
+    if n < MIN_ROLL_NUMBER_LENGTH:
+        raise InvalidRollNumberError(
+            error_messages().too_short % {'length': MIN_ROLL_NUMBER_LENGTH}
+        )
+    if n > MAX_ROLL_NUMBER_LENGTH:
+        raise InvalidRollNumberError(
+            error_messages().too_long % {'length': MAX_ROLL_NUMBER_LENGTH}
+        )
+    
+    # Format validation, yields the department code in the same pass
+    dept_code = scan_roll_number(roll_number)
+    if dept_code is None:
+        raise InvalidRollNumberError(error_messages().invalid_format)
+    
+    _check_department_code(dept_code, department_codes)
+    
+    return roll_number
+
+def validate_roll_number_format(roll_number: str, event: Event) -> str:
     """
     Validate roll number format
     Args:
         roll_number: The roll number to validate
         event: The event context for validation
-        raise_exception: Whether to raise exception on invalid format
     Returns:
-        (bool, str): (is_valid, normalized_roll_number) if raise_exception is False
-        str: normalized_roll_number if raise_exception is True
+        str: The normalized roll number
     Raises:
-        InvalidRollNumberError: If roll number is invalid and raise_exception is True
+        InvalidRollNumberError: If roll number is invalid
+    """
+    return _parse_roll_number(roll_number, _get_department_codes_entry(event))
+
+def try_validate_roll_number_format(roll_number: str, event: Event) -> Tuple[bool, str]:
+    """
+    Validate roll number format without raising
+    Returns:
+        (bool, str): (True, normalized_roll_number) or (False, error_message)
     """
     try:
-        if not roll_number:
-            raise InvalidRollNumberError(ERROR_MESSAGES['empty'])
-        
-        # Normalize roll number
-        roll_number = normalize_roll_number(roll_number)
-        
-        # Length validation
-        if len(roll_number) < MIN_ROLL_NUMBER_LENGTH:
-            raise InvalidRollNumberError(
-                ERROR_MESSAGES['too_short'].format(length=MIN_ROLL_NUMBER_LENGTH)
-            )
-        if len(roll_number) > MAX_ROLL_NUMBER_LENGTH:
-            raise InvalidRollNumberError(
-                ERROR_MESSAGES['too_long'].format(length=MAX_ROLL_NUMBER_LENGTH)
-            )
-        
-        # Format validation
-        if not re.match(ROLL_NUMBER_PATTERN, roll_number):
-            raise InvalidRollNumberError(ERROR_MESSAGES['invalid_format'])
-        
-        # Department code validation
-        validate_department_code(roll_number, event)
-        
-        return roll_number if raise_exception else (True, roll_number)
-        
+        return True, validate_roll_number_format(roll_number, event)
     except InvalidRollNumberError as e:
-        if raise_exception:
-            raise
         return False, str(e)
 
+def _duplicate_check_cache_key(event: Event, question_id: int, roll_number: str) -> str:
+    return get_cache_key(event.id, f'dup:{question_id}:{roll_number}')
+
 def check_existing_roll_number(question_id: int, roll_number: str, event: Event, exclude_order: Optional[Order] = None) -> Tuple[bool, Optional[str]]:
     """
     Check if roll number already exists in the event
     Returns:
         (bool, str): (exists, error_message)
     """
-    try:
-        # Normalize roll number first
-        roll_number = normalize_roll_number(roll_number)
-        
-        # Use select_related to optimize query
-        query = QuestionAnswer.objects.select_related(
-            'orderposition__order'
+    # Normalize roll number first
+    roll_number = normalize_roll_number(roll_number)
+    
+    # Repeated checks during a checkout are served from the cache,
+    # on_order_placed always checks the database again
+    cache_key = None
+    exists = None
+    if exclude_order is None:
+        cache_key = _duplicate_check_cache_key(event, question_id, roll_number)
+        exists = cache.get(cache_key)
+    
+    if exists is None:
+        # Compare against the normalized value so the UPPER(answer) index from migration 0004 is used
+        query = QuestionAnswer.objects.annotate(
+            answer_upper=Upper('answer')
         ).filter(
             question_id=question_id,
-            answer__iexact=roll_number,
-            orderposition__order__event=event,
+            answer_upper=roll_number,
+            orderposition__order__event_id=event.pk,
             orderposition__order__status__in=DUPLICATE_CHECK_ORDER_STATUSES
         )
         
         if exclude_order:
-            query = query.exclude(orderposition__order=exclude_order)
+            query = query.exclude(orderposition__order_id=exclude_order.pk)
         
         exists = query.exists()
-        if exists:
-            error_msg = ERROR_MESSAGES['duplicate'].format(number=roll_number)
+        if cache_key is not None:
+            cache.set(cache_key, exists, timeout=DUPLICATE_CHECK_CACHE_TIMEOUT)
+    
+    if exists:
+        error_msg = error_messages().duplicate % {'number': roll_number}
+        if logger.isEnabledFor(logging.WARNING):
             logger.warning(
-                f"Duplicate roll number detected: {roll_number}",
+                "Duplicate roll number detected: %s",
+                roll_number,
                 extra={
                     'event_id': event.id,
                     'roll_number': roll_number,
                     'question_id': question_id
                 }
             )
-            return True, error_msg
-            
-        return False, None
+        return True, error_msg
         
-    except Exception as e:
-        error_msg = f"Error checking roll number: {str(e)}"
-        logger.error(
-            error_msg,
+    return False, None
+
+def check_existing_roll_numbers_bulk(question_id: int, roll_numbers: Set[str], event: Event, exclude_order: Optional[Order] = None, lock: bool = False) -> Set[str]:
+    """
+    Check several normalized roll numbers for existing answers with a single query
+    Args:
+        lock: Lock the conflicting answers until the surrounding transaction ends
+    Returns:
+        set: The roll numbers that are already in use, upper-cased
+    """
+    if not roll_numbers:
+        return set()
+    
+    # Roll numbers are normalized upper-case, answers are matched through the UPPER(answer) index
+    query = QuestionAnswer.objects.annotate(
+        answer_upper=Upper('answer')
+    ).filter(
+        question_id=question_id,
+        answer_upper__in=list(roll_numbers),
+        orderposition__order__event_id=event.pk,
+        orderposition__order__status__in=DUPLICATE_CHECK_ORDER_STATUSES
+    )
+    
+    if exclude_order:
+        query = query.exclude(orderposition__order_id=exclude_order.pk)
+    if lock:
+        # Only the answer rows, not the joined positions and orders. OF needs model
+        # instances, a values_list() query has nothing to resolve 'self' against.
+        of = ('self',) if connection.features.has_select_for_update_of else ()
+        duplicates = {a.answer_upper for a in query.only('pk').select_for_update(of=of)}
+    else:
+        duplicates = set(query.values_list('answer_upper', flat=True))
+    if duplicates and logger.isEnabledFor(logging.WARNING):
+        roll_numbers = sorted(duplicates)
+        logger.warning(
+            "Duplicate roll numbers detected: %s",
+            ', '.join(roll_numbers),
             extra={
                 'event_id': event.id,
-                'roll_number': roll_number,
+                'roll_numbers': roll_numbers,
                 'question_id': question_id
-            },
-            exc_info=True
+            }
         )
-        return True, error_msg
+    return duplicates
+
+def get_settings_version(event: Event) -> int:
+    """Get the version of the event's valid student list"""
+    return event.settings.get(SETTINGS_KEY_VERSION, 0, as_type=int)
 
-def get_valid_students(event: Event) -> list:
-    """Get valid students list with caching"""
-    cache_key = get_cache_key(event.id, 'valid_students')
-    students = cache.get(cache_key)
+def get_valid_students_error_list(event: Event) -> str:
+    """
+    Get the listing of the valid students shown when a roll number is not in
+    the list, built once per settings version and cached
+    """
+    key_type = f'valid_students_error_list:{get_settings_version(event)}'
+    revision, error_list = _get_revisioned(event.id, key_type)
     
-    if students is None:
-        students = event.settings.get('valid_roll_numbers', [])
-        cache.set(cache_key, students, timeout=3600)
+    if error_list is None:
+        students = event.settings.get(SETTINGS_KEY_VALID_STUDENTS, [], as_type=list)
+        error_list = '\n'.join(
+            f"- {s['roll_number']}: {s['name']} ({s.get('department', '')})"
+            for s in students
+        )
+        _set_revisioned(event.id, key_type, revision, error_list)
     
-    return students
+    return error_list
+
+# Process-local copy of the normalized roll numbers: {event_id: (version, rolls)}
+_roll_cache: Dict[int, Tuple[int, FrozenSet[str]]] = {}
+
+def get_valid_rolls(event: Event, version: Optional[int] = None) -> FrozenSet[str]:
+    """
+    Get the normalized roll numbers of the predefined list for O(1) membership tests.
+    Kept per process and in the shared cache, keyed by the settings version.
+    """
+    if version is None:
+        version = get_settings_version(event)
+    hit = _roll_cache.get(event.pk)
+    if hit and hit[0] == version:
+        return hit[1]
+    
+    revision, hit = _get_revisioned(event.id, 'valid_rolls')
+    if not hit or hit[0] != version:
+        compact = event.settings.get(SETTINGS_KEY_VALID_ROLLS, None, as_type=str)
+        if compact is None:
+            # Written before the compact format existed
+            raw = [s['roll_number'] for s in event.settings.get(SETTINGS_KEY_VALID_STUDENTS, [], as_type=list)]
+        else:
+            raw = compact.split('\n') if compact else []
+        rolls = frozenset(normalize_roll_number(r) for r in raw)
+        hit = (version, rolls)
+        _set_revisioned(event.id, 'valid_rolls', revision, hit)
+    
+    _roll_cache[event.pk] = hit
+    return hit[1]
+
+RollNumberSnapshot = namedtuple('RollNumberSnapshot', ['question_id', 'valid_rolls', 'version'])
+
+def get_snapshot(event: Event) -> RollNumberSnapshot:
+    """
+    Roll number configuration of the event, built once per Event instance so a
+    request reads the settings once. The plugin's own settings writes drop it
+    from the instance they go through.
+    """
+    snapshot = event.__dict__.get(SNAPSHOT_ATTR)
+    if snapshot is None:
+        version = get_settings_version(event)
+        snapshot = RollNumberSnapshot(
+            event.settings.get(SETTINGS_KEY_QUESTION_ID),
+            get_valid_rolls(event, version),
+            version
+        )
+        setattr(event, SNAPSHOT_ATTR, snapshot)
+    return snapshot
 
 def validate_against_predefined_list(roll_number: str, event: Event) -> Tuple[bool, Optional[str]]:
     """
@@ -191,42 +373,25 @@ def validate_against_predefined_list(roll_number: str, event: Event) -> Tuple[bo
     Returns:
         (bool, str): (is_valid, error_message)
     """
-    try:
-        valid_students = get_valid_students(event)
-        if not valid_students:
-            return True, None
-            
-        roll_number = normalize_roll_number(roll_number)
-        valid_roll_numbers = {
-            normalize_roll_number(s['roll_number']): s 
-            for s in valid_students
-        }
-        
-        if roll_number not in valid_roll_numbers:
-            student_list = '\n'.join(
-                f"- {s['roll_number']}: {s['name']} ({s.get('department', '')})"
-                for s in valid_students
-            )
-            error_msg = ERROR_MESSAGES['not_in_list'].format(list=student_list)
-            logger.warning(
-                f"Invalid roll number not in predefined list: {roll_number}",
-                extra={
-                    'event_id': event.id,
-                    'roll_number': roll_number
-                }
-            )
-            return False, error_msg
-            
+    valid_rolls = get_snapshot(event).valid_rolls
+    if not valid_rolls:
         return True, None
         
-    except Exception as e:
-        error_msg = f"Error validating against predefined list: {str(e)}"
-        logger.error(
-            error_msg,
-            extra={'event_id': event.id, 'roll_number': roll_number},
-            exc_info=True
+    roll_number = normalize_roll_number(roll_number)
+    
+    if roll_number not in valid_rolls:
+        error_msg = error_messages().not_in_list % {'list': get_valid_students_error_list(event)}
+        logger.warning(
+            "Invalid roll number not in predefined list: %s",
+            roll_number,
+            extra={
+                'event_id': event.id,
+                'roll_number': roll_number
+            }
         )
         return False, error_msg
+        
+    return True, None
 
 def validate_roll_number_answer(answer: str, event: Event, question_id: int, exclude_order: Optional[Order] = None) -> str:
     """
@@ -254,112 +419,148 @@ def validate_roll_number_answer(answer: str, event: Event, question_id: int, exc
     
     return roll_number
 
+def _question_active_cache_key(event_id: int, question_id: int) -> str:
+    return get_cache_key(event_id, f'question_active:{question_id}')
+
+def _question_is_active(question_id: int, event_id: int) -> bool:
+    """Whether the roll number question exists in the event and is active, cached"""
+    cache_key = _question_active_cache_key(event_id, question_id)
+    active = cache.get(cache_key)
+    if active is None:
+        active = Question.objects.filter(id=question_id, event_id=event_id, active=True).exists()
+        cache.set(cache_key, active, timeout=QUESTION_ACTIVE_CACHE_TIMEOUT)
+    return active
+
 @receiver(validate_cart_addons, dispatch_uid="rollno_validate_cart")
 def validate_roll_number(sender: Any, **kwargs: Dict[str, Any]) -> None:
     cart_data = kwargs.get('cart_data', {})
     event = kwargs.get('event')
     
-    # Get roll number question ID from settings
-    question_id = event.settings.get('rollno_question_id')
+    # Get roll number question ID from settings, the snapshot is built once per request
+    question_id = get_snapshot(event).question_id
     if not question_id:
         return
         
-    try:
-        # Verify question exists and is active
-        question = Question.objects.select_related('event').get(
-            id=question_id,
-            event=event,
-            active=True
-        )
-    except Question.DoesNotExist:
+    # Verify question exists and is active
+    if not _question_is_active(question_id, event.pk):
         logger.warning(
-            f"Roll number question not found or inactive",
+            "Roll number question not found or inactive",
             extra={'event_id': event.id, 'question_id': question_id}
         )
         return
     
+    # Answers may be keyed by the question id as int or as str
+    qid_int = int(question_id)
+    qid_str = str(question_id)
+    
     # Get the roll number question from cart data
     for item in cart_data:
-        if 'questions' not in item:
+        questions = item.get('questions')
+        if not questions:
+            continue
+        
+        q_id = qid_int if qid_int in questions else qid_str
+        answer = questions.get(q_id)
+        if answer is None:
             continue
             
-        for q_id, answer in item['questions'].items():
-            if str(q_id) != str(question_id):
-                continue
-                
-            try:
-                # Validate roll number
-                roll_number = validate_roll_number_answer(answer, event, question_id)
-                
-                # Update the answer with normalized roll number
-                item['questions'][q_id] = roll_number
-                
-            except (InvalidRollNumberError, DuplicateRollNumberError) as e:
+        try:
+            # Validate roll number
+            roll_number = validate_roll_number_answer(answer, event, question_id)
+            
+            # Update the answer with normalized roll number
+            questions[q_id] = roll_number
+            
+        except (InvalidRollNumberError, DuplicateRollNumberError) as e:
+            if logger.isEnabledFor(logging.INFO):
                 logger.info(
-                    f"Roll number validation failed: {str(e)}",
+                    "Roll number validation failed: %s",
+                    e,
                     extra={'event_id': event.id, 'answer': answer}
                 )
-                raise ValidationError(str(e))
+            raise ValidationError(str(e))
 
 
+def _reject_order(order: Order, answer: QuestionAnswer, error: Exception) -> None:
+    """Cancel an order whose roll number failed validation"""
+    order.status = Order.STATUS_CANCELED
+    order.save(update_fields=['status'])
+    logger.warning(
+        "Roll number validation failed: %s",
+        error,
+        extra={
+            'order': order.code,
+            'event_id': order.event_id,
+            'answer': answer.answer
+        }
+    )
+    raise OrderError(str(error))
+
 @receiver(order_placed, dispatch_uid="rollno_order_placed")
 def on_order_placed(sender: Any, order: Order, **kwargs: Dict[str, Any]) -> None:
     """Double-check validation when order is placed to prevent race conditions"""
     event = order.event
-    question_id = event.settings.get('rollno_question_id')
+    question_id = get_snapshot(event).question_id
     
     if not question_id:
         return
         
-    try:
-        question = Question.objects.select_related('event').get(
-            id=question_id,
-            event=event,
-            active=True
-        )
-    except Question.DoesNotExist:
+    if not _question_is_active(question_id, event.pk):
         logger.warning(
-            f"Roll number question not found or inactive",
+            "Roll number question not found or inactive",
             extra={'event_id': event.id, 'question_id': question_id}
         )
         return
         
     with transaction.atomic():
         try:
-            for position in order.positions.select_related('order').prefetch_related('answers').all():
-                answers = position.answers.filter(question_id=question_id)
+            # One query for the roll number answers of all positions
+            answers = QuestionAnswer.objects.filter(
+                orderposition__order=order,
+                question_id=question_id
+            ).only('id', 'answer', 'orderposition_id')
+            
+            # Validate format and predefined list first, duplicates are checked together
+            validated = []
+            for answer in answers:
+                try:
+                    roll_number = validate_roll_number_format(answer.answer, event)
+                    is_valid, error_msg = validate_against_predefined_list(roll_number, event)
+                    if not is_valid:
+                        raise InvalidRollNumberError(error_msg)
+                except InvalidRollNumberError as e:
+                    _reject_order(order, answer, e)
+                validated.append((answer, roll_number))
+            
+            # One locking query for the duplicates of all roll numbers in the order
+            duplicates = check_existing_roll_numbers_bulk(
+                question_id,
+                {roll_number for answer, roll_number in validated},
+                event,
+                exclude_order=order,
+                lock=True
+            )
+            
+            for answer, roll_number in validated:
+                if roll_number in duplicates:
+                    _reject_order(order, answer, DuplicateRollNumberError(roll_number))
                 
-                for answer in answers:
-                    try:
-                        # Validate roll number
-                        roll_number = validate_roll_number_answer(
-                            answer.answer,
-                            event,
-                            question_id,
-                            exclude_order=order
-                        )
-                        
-                        # Update answer with normalized version
-                        if answer.answer != roll_number:
-                            answer.answer = roll_number
-                            answer.save(update_fields=['answer'])
-                            
-                    except (InvalidRollNumberError, DuplicateRollNumberError) as e:
-                        order.status = Order.STATUS_CANCELED
-                        order.save(update_fields=['status'])
-                        logger.warning(
-                            f"Roll number validation failed: {str(e)}",
-                            extra={
-                                'order': order.code,
-                                'event_id': event.id,
-                                'answer': answer.answer
-                            }
-                        )
-                        raise OrderError(str(e))
-                        
+                # Update answer with normalized version
+                if answer.answer != roll_number:
+                    answer.answer = roll_number
+                    answer.save(update_fields=['answer'])
+                    
+            # The roll numbers of this order are taken once it is committed
+            taken_keys = [
+                _duplicate_check_cache_key(event, question_id, roll_number)
+                for answer, roll_number in validated
+            ]
+            transaction.on_commit(lambda: cache.delete_many(taken_keys))
+            
         except Exception as e:
             logger.error(
-                f"Unexpected error processing order: {str(e)}",
+                "Unexpected error processing order: %s",
+                e,
                 extra={
                     'order': order.code,
                     'event_id': event.id
@@ -368,4 +569,43 @@ def on_order_placed(sender: Any, order: Order, **kwargs: Dict[str, Any]) -> None
             )
             order.status = Order.STATUS_CANCELED
             order.save(update_fields=['status'])
-            raise 
\ No newline at end of file
+            raise
+
+
+# Events whose student settings must be rebuilt when the transaction commits
+_pending_rebuilds = threading.local()
+
+def _schedule_settings_rebuild(event_id: int) -> None:
+    """Coalesce all student changes of a transaction into one rebuild per event"""
+    pending = getattr(_pending_rebuilds, 'event_ids', None)
+    if pending is None:
+        pending = _pending_rebuilds.event_ids = set()
+    pending.add(event_id)
+    # Registered on every change: a rolled back transaction drops its callbacks,
+    # and the flush is a no-op once the pending events have been handled
+    transaction.on_commit(_flush_settings_rebuilds)
+
+def _flush_settings_rebuilds() -> None:
+    pending = getattr(_pending_rebuilds, 'event_ids', None)
+    if not pending:
+        return
+    _pending_rebuilds.event_ids = set()
+    # One query for all events, students are also deleted when their event is,
+    # so events that are gone are simply missing here
+    for event in Event._base_manager.filter(pk__in=pending):
+        Student._rebuild_settings(event)
+
+
+@receiver(post_save, sender=Question, dispatch_uid="rollno_question_active_saved")
+@receiver(post_delete, sender=Question, dispatch_uid="rollno_question_active_deleted")
+def on_question_change(sender: Any, instance: Question, **kwargs: Dict[str, Any]) -> None:
+    """Drop the cached active state of a changed question"""
+    cache.delete(_question_active_cache_key(instance.event_id, instance.pk))
+
+
+@receiver(post_save, sender=Student, dispatch_uid="rollno_student_saved")
+@receiver(post_delete, sender=Student, dispatch_uid="rollno_student_deleted")
+def on_student_change(sender: Any, instance: Student, **kwargs: Dict[str, Any]) -> None:
+    """Keep the event's valid roll numbers in sync with the Student table"""
+    # The id only, instances deleted through a queryset or cascade have no event loaded
+    _schedule_settings_rebuild(instance.event_id)
@@ -4,11 +4,15 @@ from django.utils.translation import gettext as _
 from pretix.base.models import Event, Organizer, Question, Order, OrderPosition, Item, QuestionAnswer
 from pretix_rollno_validator.signals import (
     validate_roll_number_format,
+    try_validate_roll_number_format,
     normalize_roll_number,
     clean_roll_number,
+    scan_roll_number,
     check_existing_roll_number,
+    check_existing_roll_numbers_bulk,
     validate_against_predefined_list
 )
+from pretix_rollno_validator.models import Student
 from pretix_rollno_validator.exceptions import DuplicateRollNumberError, InvalidRollNumberError
 from pretix_rollno_validator.constants import (
     MIN_ROLL_NUMBER_LENGTH,
@@ -34,7 +38,7 @@ def event():
         {'roll_number': 'CSE002', 'name': 'Jane Smith', 'department': 'Computer Science'},
         {'roll_number': 'ECE001', 'name': 'Alice Johnson', 'department': 'Electronics'}
     ]
-    event.settings.set('valid_roll_numbers', valid_students)
+    Student._store_settings(event, valid_students)
     return event
 
 
@@ -132,13 +136,34 @@ class TestRollNumberValidator:
             assert expected_error in str(exc.value)
         
         # Test non-raising mode
-        is_valid, _ = validate_roll_number_format('CSE001', raise_exception=False)
+        is_valid, roll_number = try_validate_roll_number_format('cse001', self.event)
         assert is_valid
+        assert roll_number == 'CSE001'
         
-        is_valid, error = validate_roll_number_format('invalid', raise_exception=False)
+        is_valid, error = try_validate_roll_number_format('invalid', self.event)
         assert not is_valid
         assert 'must start with letters followed by numbers' in error
 
+    def test_scan_roll_number(self):
+        """Test the regex-free format scan"""
+        test_cases = [
+            ('CSE001', 'CSE'),
+            ('CSE-001', 'CSE'),
+            ('ME001', 'ME'),
+            ('MECH101', 'MECH'),
+            ('CS999999', 'CS'),
+            ('C001', None),          # Department code too short
+            ('CSENG001', None),      # Department code too long
+            ('CS-01', None),         # Too few digits
+            ('CS1234567', None),     # Too many digits
+            ('CSE--001', None),      # Double hyphen
+            ('CSE001A', None),       # Trailing letter
+            ('', None)
+        ]
+        
+        for input_str, expected in test_cases:
+            assert scan_roll_number(input_str) == expected
+
     def test_check_existing_roll_number(self):
         """Test duplicate roll number detection"""
         event = self.event
@@ -164,6 +189,29 @@ class TestRollNumberValidator:
         assert exists
         assert 'already in use' in error
 
+    def test_check_existing_roll_numbers_bulk(self):
+        """Test duplicate detection for several roll numbers at once"""
+        event = self.event
+        question = self.roll_number_question
+        
+        assert check_existing_roll_numbers_bulk(question.pk, set(), event) == set()
+        assert check_existing_roll_numbers_bulk(question.pk, {'CSE001', 'ECE001'}, event) == set()
+        
+        QuestionAnswer.objects.create(
+            orderposition=self.order_position,
+            question=question,
+            answer='cse001'
+        )
+        
+        duplicates = check_existing_roll_numbers_bulk(question.pk, {'CSE001', 'ECE001'}, event)
+        assert duplicates == {'CSE001'}
+        
+        # Answers of the excluded order are not duplicates
+        duplicates = check_existing_roll_numbers_bulk(
+            question.pk, {'CSE001'}, event, exclude_order=self.order_position.order
+        )
+        assert duplicates == set()
+
     def test_validate_against_predefined_list(self):
         """Test validation against predefined list"""
         event = self.event
@@ -182,7 +230,7 @@ class TestRollNumberValidator:
         assert 'CSE001: John Doe' in error
         
         # Test with no predefined list
-        event.settings.delete('valid_roll_numbers')
+        Student._store_settings(event, [])
         is_valid, _ = validate_against_predefined_list('CSE999', event)
         assert is_valid
 
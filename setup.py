@@ -61,5 +61,9 @@ pretix_rollno_validator=pretix_rollno_validator:PluginApp
             'flake8',
             'black',
         ],
+        'fast': [
+            'pyarrow>=6.0.0',  # C-level CSV parsing for large student imports
+            'orjson>=3.6.0',  # Faster JSON encoding of the valid student list
+        ],
     },
 ) 
\ No newline at end of file
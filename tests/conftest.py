@@ -0,0 +1,129 @@
+from itertools import count
+
+import pytest
+from django_scopes import scopes_disabled
+from pretix.base.models import Event, Item, Order, OrderPosition, Organizer, Question, QuestionAnswer
+
+from utils import (
+    add_test_students_to_event,
+    clear_caches,
+    create_test_order,
+    create_test_orders,
+    next_test_order_generation,
+)
+
+# Orders shared by the whole session, for tests that only read them
+SHARED_ORDER_ROLLS = (
+    ('CSE001', Order.STATUS_PAID),
+    ('CSE002', Order.STATUS_PENDING),
+    ('ECE001', Order.STATUS_PAID),
+)
+
+
+@pytest.fixture(autouse=True)
+def no_scopes():
+    """The plugin's code runs outside of organizer scopes in these tests"""
+    with scopes_disabled():
+        yield
+
+
+@pytest.fixture(autouse=True)
+def forget_test_orders():
+    """Orders of create_test_order roll back with each test, whichever event they belong to"""
+    yield
+    next_test_order_generation()
+
+
+def _create_event(slug):
+    """Create an event with a ticket item, the roll number question and the default students"""
+    organizer = Organizer.objects.create(name='Dummy', slug=slug)
+    event = Event.objects.create(
+        organizer=organizer,
+        name='Dummy',
+        slug=slug,
+        date_from='2024-01-01',
+        plugins='pretix_rollno_validator'
+    )
+    Item.objects.create(
+        event=event,
+        name='Ticket',
+        default_price=10
+    )
+    Question.objects.create(
+        event=event,
+        question='Roll Number',
+        type=Question.TYPE_TEXT,
+        required=True,
+        identifier='roll_number'
+    )
+    add_test_students_to_event(event)
+    return event
+
+
+def _delete_event(event):
+    """Remove a committed event with its orders, which protect its items from deletion"""
+    QuestionAnswer.objects.filter(orderposition__order__event=event).delete()
+    OrderPosition.all.filter(order__event=event).delete()
+    Order.objects.filter(event=event).delete()
+    organizer = event.organizer
+    event.delete_sub_objects()
+    event.delete()
+    organizer.delete()
+
+
+@pytest.fixture
+def event(db):
+    with scopes_disabled():
+        event = _create_event('dummy')
+    yield event
+    clear_caches(event)
+
+
+@pytest.fixture
+def make_order(event):
+    """Factory for orders of the test's event, rolled back with the test transaction"""
+    def _make_order(roll_number, status=Order.STATUS_PENDING):
+        return create_test_order(event, roll_number, status)
+    return _make_order
+
+
+_module_event_ids = count(1)
+
+
+@pytest.fixture(scope='module')
+def event_with_roll_question(django_db_setup, django_db_blocker):
+    """Event with item and roll number question, created once per test module"""
+    with django_db_blocker.unblock(), scopes_disabled():
+        event = _create_event(f'module-{next(_module_event_ids)}')
+    yield event
+    with django_db_blocker.unblock(), scopes_disabled():
+        clear_caches(event)
+        _delete_event(event)
+
+
+@pytest.fixture
+def module_event(db, event_with_roll_question):
+    """
+    The module's event for a test that changes it. Database changes roll back with
+    the test, the caches of the event are cleared so the next test sees them undone.
+    """
+    yield event_with_roll_question
+    clear_caches(event_with_roll_question)
+
+
+@pytest.fixture(scope='session')
+def shared_event(django_db_setup, django_db_blocker):
+    with django_db_blocker.unblock(), scopes_disabled():
+        event = _create_event('shared')
+    yield event
+    # Created outside the test transactions and kept by --reuse-db, so delete explicitly
+    with django_db_blocker.unblock(), scopes_disabled():
+        clear_caches(event)
+        _delete_event(event)
+
+
+@pytest.fixture(scope='session')
+def shared_orders(shared_event, django_db_blocker):
+    """Orders created once per session, tests must not modify them"""
+    with django_db_blocker.unblock():
+        return create_test_orders(shared_event, SHARED_ORDER_ROLLS)
@@ -0,0 +1,165 @@
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.utils.timezone import now
+from pretix.base.models import Event
+
+from pretix_rollno_validator.constants import SETTINGS_KEY_VALID_ROLLS
+from pretix_rollno_validator.forms import StudentBulkImportForm
+from pretix_rollno_validator.models import Student
+
+HEADER = 'roll_number,name,department,email,is_active\n'
+
+
+def _import_form(event, content, update_existing=True):
+    data = {'event': event.pk}
+    if update_existing:
+        data['update_existing'] = 'on'
+    upload = SimpleUploadedFile('students.csv', content.encode(), content_type='text/csv')
+    return StudentBulkImportForm(data=data, files={'csv_file': upload})
+
+
+def _import(event, content, update_existing=True):
+    form = _import_form(event, content, update_existing)
+    assert form.is_valid(), form.errors
+    return form.save()
+
+
+def _students(event):
+    return {
+        s.roll_number: s
+        for s in Student.objects.filter(event=event)
+    }
+
+
+def test_import_creates_and_updates(event):
+    Student.objects.create(event=event, roll_number='cse001', name='Old', department='Computer Science')
+    
+    result = _import(event, HEADER + (
+        'CSE001,John Doe,Computer Science,john@example.com,yes\n'
+        ' cse002 ,Jane Smith,Computer Science,,\n'
+        'ECE001,Alice Johnson,Electronics,,False\n'
+        'ECE002,Bob Brown,Electronics,,0\n'
+    ))
+    
+    assert result['errors'] == []
+    assert sorted(s.roll_number for s in result['created']) == ['CSE002', 'ECE001', 'ECE002']
+    assert [s.roll_number for s in result['updated']] == ['CSE001']
+    
+    students = _students(event)
+    # Stored lower-case before, matched case-insensitively and normalized
+    assert students['CSE001'].name == 'John Doe'
+    assert students['CSE001'].email == 'john@example.com'
+    # A blank is_active means active, only t/y/1 prefixes are true otherwise
+    assert students['CSE002'].is_active
+    assert not students['ECE001'].is_active
+    assert not students['ECE002'].is_active
+    
+    # Bulk writes send no signals, save() rebuilds the settings itself
+    rolls = Event.objects.get(pk=event.pk).settings.get(SETTINGS_KEY_VALID_ROLLS)
+    assert sorted(rolls.split('\n')) == ['CSE001', 'CSE002']
+
+
+def test_import_keeps_existing_students(event):
+    Student.objects.create(event=event, roll_number='CSE001', name='Old', department='Computer Science')
+    
+    result = _import(event, HEADER + (
+        'CSE001,John Doe,Computer Science,,\n'
+        'CSE002,Jane Smith,Computer Science,,\n'
+    ), update_existing=False)
+    
+    assert result['updated'] == []
+    assert [s.roll_number for s in result['created']] == ['CSE002']
+    assert _students(event)['CSE001'].name == 'Old'
+
+
+def test_import_duplicate_rows(event):
+    content = HEADER + (
+        'CSE001,First,Computer Science,,\n'
+        'cse001,Second,Computer Science,,\n'
+    )
+    
+    # The last row wins when updating, the first one otherwise
+    result = _import(event, content)
+    assert [s.name for s in result['created']] == ['Second']
+    assert _students(event)['CSE001'].name == 'Second'
+    
+    Student.objects.filter(event=event).delete()
+    result = _import(event, content, update_existing=False)
+    assert [s.name for s in result['created']] == ['First']
+
+
+def test_import_reports_invalid_rows(event):
+    result = _import(event, HEADER + (
+        'CSE001,John Doe,Computer Science,not-an-email,\n'
+        f'{"X" * 21},Too Long,Computer Science,,\n'
+        'CSE002,Jane Smith,Computer Science,,\n'
+    ))
+    
+    assert [error.split(':')[0] for error in result['errors']] == ['Row 2', 'Row 3']
+    assert list(_students(event)) == ['CSE002']
+
+
+def test_import_requires_columns(event):
+    form = _import_form(event, 'roll_number,name\nCSE001,John Doe\n')
+    assert not form.is_valid()
+    assert 'department' in str(form.errors['csv_file'])
+
+
+def test_import_reports_unparsable_file(event):
+    # Rows are parsed while saving, a broken row aborts the import instead of a server error
+    result = _import(event, HEADER + 'CSE001,"' + 'x' * 200000 + '",Computer Science,,\n')
+    
+    assert result['created'] == []
+    assert 'Error reading CSV file' in result['errors'][0]
+    assert not Student.objects.filter(event=event).exists()
+
+
+def test_import_rolls_back_on_conflict(event):
+    form = _import_form(event, HEADER + (
+        'CSE001,John Doe,Computer Science,,\n'
+        'CSE002,Jane Smith,Computer Science,,\n'
+    ))
+    assert form.is_valid(), form.errors
+    
+    rows = form._rows
+    
+    def rows_with_concurrent_import():
+        yield from rows
+        # Added by another import after this one loaded the existing students
+        Student.objects.create(event=event, roll_number='CSE002', name='Other', department='Computer Science')
+    
+    form._rows = rows_with_concurrent_import()
+    result = form.save()
+    
+    assert result['created'] == []
+    assert 'please upload the file again' in result['errors'][0]
+    assert list(_students(event)) == ['CSE002']
+
+
+def _student(event, roll_number, name):
+    return Student(
+        event=event, roll_number=roll_number, name=name, department='Computer Science',
+        email='', batch='2024', is_active=True
+    )
+
+
+def test_copy_import_upserts_case_insensitively(module_event):
+    if connection.vendor != 'postgresql':
+        pytest.skip('COPY imports are only used on PostgreSQL')
+    
+    table = connection.ops.quote_name(Student._meta.db_table)
+    with connection.cursor() as cursor:
+        # Created by migration 0003, which --nomigrations skips
+        cursor.execute(
+            f'CREATE UNIQUE INDEX rn_event_upper_roll_uniq ON {table} (event_id, UPPER(roll_number))'
+        )
+    Student.objects.create(event=module_event, roll_number='cse010', name='Old', department='Computer Science')
+    
+    StudentBulkImportForm._copy_students(module_event, [
+        _student(module_event, 'CSE010', 'New'),
+        _student(module_event, 'CSE011', 'Other'),
+    ], now())
+    
+    students = dict(Student.objects.filter(event=module_event).values_list('roll_number', 'name'))
+    assert students == {'CSE010': 'New', 'CSE011': 'Other'}
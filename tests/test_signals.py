@@ -0,0 +1,123 @@
+import pytest
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from freezegun import freeze_time
+from pretix.base.models import Event, Order, Question
+
+from pretix_rollno_validator.constants import DUPLICATE_CHECK_CACHE_TIMEOUT, SETTINGS_KEY_VALID_ROLLS
+from pretix_rollno_validator.models import Student
+from pretix_rollno_validator.signals import (
+    _duplicate_check_cache_key,
+    _pending_rebuilds,
+    check_existing_roll_number,
+    check_existing_roll_numbers_bulk,
+    on_order_placed,
+)
+
+from utils import create_test_order
+
+
+@pytest.fixture(autouse=True)
+def local_cache(settings):
+    """Cache in memory, pretix's test settings use the dummy cache"""
+    settings.CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'rollno-tests',
+        }
+    }
+    yield
+    cache.clear()
+
+
+def _question_id(event):
+    return Question.objects.get(event=event, identifier='roll_number').pk
+
+
+def test_duplicate_check_is_cached(event, make_order):
+    question_id = _question_id(event)
+    
+    with freeze_time() as frozen:
+        assert check_existing_roll_number(question_id, 'cse001', event) == (False, None)
+        make_order('CSE001')
+        
+        # Repeated checks during a checkout are served from the cache until it expires
+        assert check_existing_roll_number(question_id, 'CSE001', event) == (False, None)
+        frozen.tick(DUPLICATE_CHECK_CACHE_TIMEOUT + 1)
+        exists, error = check_existing_roll_number(question_id, 'CSE001', event)
+        assert exists
+        assert 'CSE001' in error
+
+
+def test_duplicate_check_with_order_skips_cache(event, make_order):
+    question_id = _question_id(event)
+    assert check_existing_roll_number(question_id, 'CSE001', event) == (False, None)
+    make_order('CSE001')
+    
+    # on_order_placed passes its order and always asks the database
+    exists, error = check_existing_roll_number(question_id, 'CSE001', event, exclude_order=make_order('ECE001'))
+    assert exists
+
+
+def test_order_placed_clears_duplicate_cache_on_commit(module_event, django_capture_on_commit_callbacks):
+    question_id = _question_id(module_event)
+    module_event.settings.set('rollno_question_id', question_id)
+    key = _duplicate_check_cache_key(module_event, question_id, 'CSE002')
+    
+    assert check_existing_roll_number(question_id, 'CSE002', module_event) == (False, None)
+    order = create_test_order(module_event, 'CSE002')
+    
+    with django_capture_on_commit_callbacks() as callbacks:
+        on_order_placed(sender=module_event, order=order)
+    
+    # Other checkouts may still see the cached answer until the order is committed
+    assert cache.get(key) is False
+    for callback in callbacks:
+        callback()
+    assert cache.get(key) is None
+    
+    order.refresh_from_db()
+    assert order.status == Order.STATUS_PENDING
+    assert check_existing_roll_number(question_id, 'CSE002', module_event)[0]
+
+
+def test_bulk_check_locks_answers(db, shared_event, shared_orders):
+    question_id = _question_id(shared_event)
+    
+    with transaction.atomic():
+        with CaptureQueriesContext(connection) as queries:
+            duplicates = check_existing_roll_numbers_bulk(
+                question_id, {'CSE001', 'CSE002', 'CSE003'}, shared_event, lock=True
+            )
+    
+    assert duplicates == {'CSE001', 'CSE002'}
+    assert len(queries) == 1
+    sql = queries[0]['sql']
+    if connection.features.has_select_for_update_of:
+        # Only the answers are locked, not the joined orders and positions
+        assert 'FOR UPDATE OF' in sql
+    elif connection.features.has_select_for_update:
+        assert 'FOR UPDATE' in sql
+    
+    # Answers of the excluded order are not duplicates
+    assert check_existing_roll_numbers_bulk(
+        question_id, {'CSE001'}, shared_event, exclude_order=shared_orders[0], lock=True
+    ) == set()
+
+
+def test_student_changes_rebuild_settings_once(event, mocker, django_capture_on_commit_callbacks):
+    # Events of earlier tests stay pending when their transaction rolls back
+    _pending_rebuilds.event_ids = set()
+    rebuild = mocker.spy(Student, '_rebuild_settings')
+    
+    with django_capture_on_commit_callbacks(execute=True):
+        for roll_number in ('CSE101', 'CSE102', 'CSE103'):
+            Student.objects.create(event=event, roll_number=roll_number, name=roll_number, department='Computer Science')
+        Student.objects.filter(event=event, roll_number='CSE101').delete()
+        assert rebuild.call_count == 0
+    
+    # One rebuild for all changes of the transaction, after it committed
+    assert rebuild.call_count == 1
+    rolls = Event.objects.get(pk=event.pk).settings.get(SETTINGS_KEY_VALID_ROLLS)
+    assert sorted(rolls.split('\n')) == ['CSE102', 'CSE103']
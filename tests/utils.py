@@ -1,62 +1,241 @@
-from typing import Dict, Any, Optional
-from pretix.base.models import Event, Order, OrderPosition, QuestionAnswer
+"""
+Helpers for creating test data.
+
+Orders are created with batched inserts: use create_test_orders_bulk for many
+roll numbers with one status, create_test_orders for (roll_number, status)
+pairs and create_test_order for a single order.
+"""
+import csv
+import io
+import os
+import string
+from datetime import timedelta
+from functools import lru_cache
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from django.db import connection, transaction
+from django.utils.crypto import get_random_string
+from django.utils.timezone import now
+from django_scopes import scopes_disabled
+from pretix.base.models import Event, Item, Order, OrderPosition, Question, QuestionAnswer
+
+try:
+    import numpy
+    import pandas
+except ImportError:  # Optional, only speeds up create_test_students_bulk
+    numpy = pandas = None
+
+# Rows per bulk INSERT. OrderPosition has about ten columns, so 500 rows stay far
+# below PostgreSQL's limit of 65535 parameters per statement
+TEST_ORDER_BATCH_SIZE = int(os.getenv('PRETIX_TEST_BULK_BATCH_SIZE', '500'))
+
+
+@lru_cache(maxsize=None)
+@scopes_disabled()
+def _event_item_id(event_id: int) -> Optional[int]:
+    return Item.objects.filter(event_id=event_id).values_list('pk', flat=True).first()
+
+
+@lru_cache(maxsize=None)
+@scopes_disabled()
+def _roll_number_question_id(event_id: int) -> int:
+    return Question.objects.values_list('pk', flat=True).get(event_id=event_id, identifier='roll_number')
+
+
+def clear_event_meta_cache() -> None:
+    """Forget the memoized item and question lookups, event ids are reused after rollback"""
+    _event_item_id.cache_clear()
+    _roll_number_question_id.cache_clear()
+
+
+# Orders of create_test_order, reused until the conftest forgets them after each test
+_created_orders: Dict[Tuple[int, str, str], Order] = {}
 
 
 def create_test_order(event: Event, roll_number: str, status: str = Order.STATUS_PENDING) -> Order:
-    """Create a test order with a roll number answer"""
-    order = Order.objects.create(
-        event=event,
-        status=status,
-        total=10,
-        code=f'TEST-{roll_number}'
-    )
+    """Create a test order with a roll number answer, or return the one created before in this generation"""
+    key = (event.pk, roll_number, status)
+    order = _created_orders.get(key)
+    if order is None:
+        order = _created_orders[key] = create_test_orders_bulk(event, [roll_number], status)[0]
+    else:
+        # The same instance is handed to every caller, drop what an earlier one changed on it
+        order.refresh_from_db()
+    return order
+
+
+def next_test_order_generation() -> None:
+    """Forget the orders of create_test_order, they are gone once the test transaction rolls back"""
+    _created_orders.clear()
+
+
+def create_test_orders_bulk(event: Event, roll_numbers: Iterable[str], status: str = Order.STATUS_PENDING,
+                            batch_size: int = TEST_ORDER_BATCH_SIZE) -> List[Order]:
+    """Create one test order with the same status per roll number, with batched inserts"""
+    return create_test_orders(event, [(roll_number, status) for roll_number in roll_numbers], batch_size)
+
+
+@scopes_disabled()
+@transaction.atomic
+def create_test_orders(event: Event, rolls: Iterable[Tuple[str, str]],
+                       batch_size: int = TEST_ORDER_BATCH_SIZE) -> List[Order]:
+    """
+    Create one test order with a roll number answer per (roll_number, status) pair.
+    Orders, positions and answers are each written with one bulk_create, which
+    skips Order.save/OrderPosition.save, so the fields they fill are set here.
+    """
+    rolls = list(rolls)
+    if not rolls:
+        return []
     
-    position = OrderPosition.objects.create(
-        order=order,
-        item=event.items.first(),
-        price=10,
-        positionid=1
-    )
+    item_id = _event_item_id(event.pk)
+    question_id = _roll_number_question_id(event.pk)
+    created = now()
+    codes = list(map('TEST-{}'.format, [roll_number for roll_number, status in rolls]))
     
-    question = event.questions.get(identifier='roll_number')
-    QuestionAnswer.objects.create(
-        orderposition=position,
-        question=question,
-        answer=roll_number
-    )
+    orders = Order.objects.bulk_create([
+        Order(
+            event=event,
+            status=status,
+            total=10,
+            code=code,
+            datetime=created,
+            expires=created + timedelta(days=1)
+        )
+        for code, (roll_number, status) in zip(codes, rolls)
+    ], batch_size=batch_size)
+    if not connection.features.can_return_rows_from_bulk_insert:
+        by_code = {o.code: o for o in Order.objects.filter(event=event, code__in=codes)}
+        orders = [by_code[code] for code in codes]
     
-    return order
+    positions = OrderPosition.objects.bulk_create([
+        OrderPosition(
+            order=order,
+            item_id=item_id,
+            price=10,
+            positionid=1,
+            secret=get_random_string(32),
+            pseudonymization_id=get_random_string(10, string.ascii_uppercase + string.digits)
+        )
+        for order in orders
+    ], batch_size=batch_size)
+    if not connection.features.can_return_rows_from_bulk_insert:
+        by_order = {p.order_id: p for p in OrderPosition.objects.filter(order__in=orders)}
+        positions = [by_order[o.pk] for o in orders]
+    
+    bulk_create_roll_answers([
+        (position.pk, question_id, roll_number)
+        for position, (roll_number, status) in zip(positions, rolls)
+    ])
+    
+    return orders
+
+
+def bulk_create_roll_answers(triples: Iterable[Tuple[int, int, str]]) -> None:
+    """
+    Insert (orderposition_id, question_id, answer) rows without model instances or signals,
+    with COPY on PostgreSQL and one executemany elsewhere
+    """
+    qn = connection.ops.quote_name
+    opts = QuestionAnswer._meta
+    table = qn(opts.db_table)
+    columns = ', '.join(qn(opts.get_field(f).column) for f in ('orderposition', 'question', 'answer'))
+    
+    with connection.cursor() as cursor:
+        if connection.vendor != 'postgresql':
+            cursor.executemany(f'INSERT INTO {table} ({columns}) VALUES (%s, %s, %s)', list(triples))
+            return
+        
+        # Quote everything so empty answers are not read back as NULL
+        buffer = io.StringIO()
+        csv.writer(buffer, quoting=csv.QUOTE_ALL).writerows(triples)
+        buffer.seek(0)
+        copy_sql = f'COPY {table} ({columns}) FROM STDIN WITH (FORMAT csv)'
+        if hasattr(cursor, 'copy_expert'):  # psycopg2
+            cursor.copy_expert(copy_sql, buffer)
+        else:  # psycopg 3
+            with cursor.copy(copy_sql) as copy:
+                copy.write(buffer.getvalue())
+
+
+class StudentRecord(NamedTuple):
+    """A predefined student, stored as a dict in the event settings. Build it with create_test_student."""
+    roll_number: str
+    name: str
+    department: str
+    batch: str
+    email: str
+    is_active: bool
 
 
-def create_test_student(roll_number: str, name: str, department: str, **kwargs: Any) -> Dict[str, Any]:
-    """Create a test student dictionary"""
-    student = {
-        'roll_number': roll_number,
-        'name': name,
+def create_test_student(roll_number: str, name: str, department: str, *, batch: str = '2024',
+                        email: Optional[str] = None, is_active: bool = True) -> StudentRecord:
+    """Create a test student, the defaults of all test students are defined here only"""
+    return StudentRecord(
+        roll_number,
+        name,
+        department,
+        batch,
+        email if email is not None else f'{roll_number.lower()}@example.com',
+        is_active
+    )
+
+
+# Built once, the tuples are immutable
+_DEFAULT_STUDENTS = (
+    create_test_student('CSE001', 'John Doe', 'Computer Science'),
+    create_test_student('CSE002', 'Jane Smith', 'Computer Science'),
+    create_test_student('ECE001', 'Alice Johnson', 'Electronics'),
+)
+
+
+def create_test_students_bulk(prefix: str, n: int, department: str) -> List[dict]:
+    """
+    Create n student dicts with roll numbers <prefix>001, <prefix>002, ... for large
+    synthetic datasets, vectorized with numpy and pandas when they are installed
+    """
+    if numpy is None or pandas is None:
+        return [
+            create_test_student(f'{prefix}{i:03d}', f'Student {prefix}{i:03d}', department)._asdict()
+            for i in range(1, n + 1)
+        ]
+    
+    rolls = numpy.char.add(prefix, numpy.char.zfill(numpy.arange(1, n + 1).astype(str), 3))
+    df = pandas.DataFrame({
+        'roll_number': rolls,
+        'name': numpy.char.add('Student ', rolls),
         'department': department,
-        'batch': kwargs.get('batch', '2024'),
-        'email': kwargs.get('email', f'{roll_number.lower()}@example.com'),
-        'is_active': kwargs.get('is_active', True)
-    }
-    return student
+        'batch': '2024',
+        'email': numpy.char.add(numpy.char.lower(rolls), '@example.com'),
+        'is_active': True,
+    })
+    return df.to_dict('records')
 
 
 def add_test_students_to_event(event: Event, students: Optional[list] = None) -> None:
     """Add test students to event settings"""
     if students is None:
-        students = [
-            create_test_student('CSE001', 'John Doe', 'Computer Science'),
-            create_test_student('CSE002', 'Jane Smith', 'Computer Science'),
-            create_test_student('ECE001', 'Alice Johnson', 'Electronics')
-        ]
+        students = _DEFAULT_STUDENTS
+    # The settings hold JSON, so convert at this single boundary
+    students = [s._asdict() if isinstance(s, StudentRecord) else s for s in students]
+    
+    from pretix_rollno_validator.models import Student
     
-    event.settings.set('valid_roll_numbers', students)
+    # Writes the settings only, no Student rows, so on_student_change is not involved
+    Student._store_settings(event, students)
 
 
 def clear_caches(event: Event) -> None:
     """Clear all caches for testing"""
-    from django.core.cache import cache
-    from pretix_rollno_validator.constants import get_cache_key
+    from pretix_rollno_validator.constants import bump_revision, clear_snapshot
+    from pretix_rollno_validator.signals import _roll_cache
     
-    cache.delete(get_cache_key(event.id, 'department_codes'))
-    cache.delete(get_cache_key(event.id, 'valid_students')) 
\ No newline at end of file
+    # Drops every revisioned cache value of the event, however many there are
+    bump_revision(event.id)
+    _roll_cache.pop(event.id, None)
+    # Module and session events outlive the test transactions, so their
+    # instances must not keep settings or a snapshot of a rolled back test
+    clear_snapshot(event)
+    event.settings.flush()
+    clear_event_meta_cache()
+    next_test_order_generation() 
\ No newline at end of file